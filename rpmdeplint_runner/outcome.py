@@ -11,6 +11,12 @@ class TmtExitCodes(Enum):
     def from_rpmdeplint(cls, return_code):
         return TmtExitCodes[return_code.name]
 
+    @classmethod
+    def worst(cls, exit_codes):
+        """Pick the most severe exit code; all tests skipped means skipped."""
+        severity = [cls.SKIPPED, cls.PASSED, cls.FAILED, cls.ERROR]
+        return max(exit_codes, key=severity.index, default=cls.SKIPPED)
+
 
 class TmtResult(Enum):
     PASSED = "pass"
@@ -30,9 +36,10 @@ class RpmdeplintCodes(Enum):
 
     @classmethod
     def from_rc(cls, return_code):
-        if return_code == 1 or return_code > 3:
+        if return_code == 1 or return_code > 3 or return_code < 0:
             # from CI perspective, incorrect usage or infra error is the same;
             # it's something CI maintainers need to fix, not users.
-            # and unknown (undocumented) return code means unknown error
+            # and unknown (undocumented) return code means unknown error,
+            # negative return code means that rpmdeplint was killed by a signal
             return_code = 2
         return cls(return_code)
@@ -2,23 +2,41 @@
 
 import argparse
 import logging
+import queue
 import sys
+import threading
 import yaml
 from os import getenv
 from pathlib import Path
 from typing import Optional
 
 from rpmdeplint_runner.outcome import RpmdeplintCodes, TmtExitCodes, TmtResult
-from rpmdeplint_runner.utils import run_rpmdeplint
+from rpmdeplint_runner.utils import (
+    download_repodata,
+    run_rpmdeplint,
+    run_rpmdeplint_in_subprocess,
+    run_rpmdeplint_with_memory_budget,
+)
+from rpmdeplint_runner.utils.common import DEFAULT_PARTITION_SIZE, get_logs_dir
 from rpmdeplint_runner.utils.fedora import (
     download_rpms,
     get_repo_urls,
     get_cached_rpms,
+    get_local_rpms,
     is_prepared,
 )
+from rpmdeplint_runner.utils.profiling import PROFILERS, get_profile_files
 
 logger = logging.getLogger(__name__)
 
+TEST_NAMES = [
+    "check",
+    "check-sat",
+    "check-repoclosure",
+    "check-conflicts",
+    "check-upgrade",
+]
+
 
 def parse_args():
     """Parse arguments."""
@@ -28,15 +46,21 @@ def parse_args():
     prepare_parser = subparsers.add_parser(
         "prepare", help="prepare given workdir for running tests"
     )
-    prepare_parser.add_argument(
+    packages_group = prepare_parser.add_mutually_exclusive_group(required=True)
+    packages_group.add_argument(
         "--task-id",
         "-t",
         dest="task_id",
-        required=True,
         action="append",
         type=str,
         help="a comma-separated list of Koji task IDs",
     )
+    packages_group.add_argument(
+        "--rpms-dir",
+        dest="rpms_dir",
+        type=Path,
+        help="a local directory with RPMs to test, instead of Koji task IDs",
+    )
     prepare_parser.add_argument(
         "--release",
         "-r",
@@ -55,11 +79,60 @@ def parse_args():
     prepare_parser.add_argument(
         "--workdir", dest="work_dir", help="workdir where to store files"
     )
+    prepare_parser.add_argument(
+        "--repo-config",
+        dest="repo_config",
+        type=Path,
+        default=getenv("RPMDEPLINT_REPO_CONFIG"),
+        help="a YAML file mapping release ids to repositories; "
+        "overrides the Bodhi-driven repository resolution for listed releases",
+    )
+
+    run_options_parser = argparse.ArgumentParser(add_help=False)
+    run_options_parser.add_argument(
+        "--memory-budget",
+        dest="memory_budget",
+        type=int,
+        default=getenv("RPMDEPLINT_MEMORY_BUDGET"),
+        help="memory budget in MiB; run rpmdeplint in a child process and, "
+        "if the test allows it, check the packages in partitions",
+    )
+    run_options_parser.add_argument(
+        "--partition-size",
+        dest="partition_size",
+        type=int,
+        default=DEFAULT_PARTITION_SIZE,
+        help="number of packages in the first partition in the memory-budgeted mode",
+    )
+    run_options_parser.add_argument(
+        "--profile",
+        dest="profile",
+        action="append",
+        choices=PROFILERS,
+        help="run rpmdeplint under given profiler, can be given multiple times; "
+        "defaults to a comma-separated list in RPMDEPLINT_PROFILE",
+    )
+    run_options_parser.add_argument(
+        "--baseline-cache",
+        dest="baseline_cache",
+        type=Path,
+        default=getenv("RPMDEPLINT_BASELINE_CACHE"),
+        help="directory where baselines of repo snapshots are cached; "
+        "enables the incremental check-repoclosure, which checks only packages "
+        "from the repos affected by the tested packages (not used by check)",
+    )
+    run_options_parser.add_argument(
+        "--no-incremental",
+        dest="incremental",
+        action="store_false",
+        default=getenv("RPMDEPLINT_INCREMENTAL", "1") != "0",
+        help="run the full check-repoclosure even if --baseline-cache is set",
+    )
 
     test_parser = subparsers.add_parser(
         "run-test",
         help="run the given rpmdeplint test",
-        parents=[prepare_parser],
+        parents=[prepare_parser, run_options_parser],
         add_help=False,
     )
     test_parser.add_argument(
@@ -67,16 +140,34 @@ def parse_args():
         "-n",
         dest="test_name",
         required=True,
-        choices=[
-            "check",
-            "check-sat",
-            "check-repoclosure",
-            "check-conflicts",
-            "check-upgrade",
-        ],
+        choices=TEST_NAMES,
         help="rpmdeplint test name",
     )
 
+    pipeline_parser = subparsers.add_parser(
+        "pipeline",
+        help="prepare given workdir and run the given rpmdeplint tests; "
+        "tests for an architecture start as soon as its packages are downloaded",
+        parents=[prepare_parser, run_options_parser],
+        add_help=False,
+    )
+    pipeline_parser.add_argument(
+        "--name",
+        "-n",
+        dest="test_names",
+        required=True,
+        action="append",
+        choices=TEST_NAMES,
+        help="rpmdeplint test name, can be given multiple times",
+    )
+    pipeline_parser.add_argument(
+        "--queue-size",
+        dest="queue_size",
+        type=int,
+        default=1,
+        help="how many architectures can be downloaded ahead of the running tests",
+    )
+
     args = parser.parse_args()
 
     if not args.command:
@@ -86,7 +177,7 @@ def parse_args():
     # turn string (a comma-separated list of task ids) into a Python list
     # ["428432,4535432", "123456"] -> ["428432", "4535432", "123456"]
     task_ids = []
-    for task_id_str in args.task_id:
+    for task_id_str in args.task_id or []:
         task_ids.extend(list(task_id_str.strip().split(",")))
     args.task_id = task_ids
 
@@ -99,17 +190,40 @@ def parse_args():
 
     args.work_dir = Path(args.work_dir) if args.work_dir else Path.cwd()
 
+    if args.command != "prepare" and not args.incremental:
+        args.baseline_cache = None
+
+    if args.command != "prepare" and args.profile is None:
+        profile = getenv("RPMDEPLINT_PROFILE")
+        profilers = [x.strip() for x in (profile or "").split(",") if x.strip()]
+        args.profile = profilers or None
+        for profiler in profilers:
+            if profiler not in PROFILERS:
+                parser.error(f"invalid profiler in RPMDEPLINT_PROFILE: {profiler}")
+
     return args
 
 
-def prepare(work_dir: Path, task_ids: list[str], arches: list[str]) -> None:
+def prepare(
+    work_dir: Path,
+    task_ids: list[str],
+    arches: list[str],
+    rpms_dir: Optional[Path] = None,
+) -> None:
     """Run prepare command.
 
     :param work_dir: workdir
     :param task_ids: task ids
     :param arches: list of architectures
+    :param rpms_dir: local directory with RPMs, nothing needs to be downloaded then
     :return: None
     """
+    if rpms_dir:
+        if not rpms_dir.is_dir():
+            print(f"Error: {rpms_dir} is not a directory.", file=sys.stderr)
+            sys.exit(1)
+        return
+
     for task_id in task_ids:
         download_rpms(task_id, work_dir, arches)
 
@@ -120,6 +234,12 @@ def run_test(
     release_id: str,
     task_ids: list[str],
     arch: str,
+    memory_budget: Optional[int] = None,
+    partition_size: int = DEFAULT_PARTITION_SIZE,
+    rpms_dir: Optional[Path] = None,
+    repo_config: Optional[Path] = None,
+    profile: Optional[list[str]] = None,
+    baseline_cache: Optional[Path] = None,
 ) -> None:
     """Run rpmdeplint test.
 
@@ -128,61 +248,282 @@ def run_test(
     :param release_id: release id, example: f33
     :param task_ids: task ids
     :param arch: architecture
+    :param memory_budget: memory budget in MiB, or None for no budget
+    :param partition_size: number of packages in the first partition
+    :param rpms_dir: local directory with RPMs to test instead of the task ids
+    :param repo_config: config file overriding repos for some releases
+    :param profile: a list of profilers to run rpmdeplint under
+    :param baseline_cache: directory with cached repo baselines, or None
+                           to run the full check-repoclosure
     :return: None
     """
-    repo_urls = get_repo_urls(release_id, arch)
-    rpms_list = get_cached_rpms(work_dir, [arch], task_ids)
+    repo_urls = get_repo_urls(release_id, arch, repo_config=repo_config)
+    tmt_exit_code, logs = check(
+        work_dir,
+        test_name,
+        repo_urls,
+        task_ids,
+        arch,
+        memory_budget,
+        partition_size,
+        rpms_dir,
+        profile,
+        baseline_cache,
+    )
+    save_results_and_exit(tmt_exit_code, logs)
+
 
-    if not is_prepared(work_dir, task_ids, [arch]):
+def check(
+    work_dir: Path,
+    test_name: str,
+    repo_urls: dict[str, str],
+    task_ids: list[str],
+    arch: str,
+    memory_budget: Optional[int] = None,
+    partition_size: int = DEFAULT_PARTITION_SIZE,
+    rpms_dir: Optional[Path] = None,
+    profile: Optional[list[str]] = None,
+    baseline_cache: Optional[Path] = None,
+    in_subprocess: bool = False,
+) -> tuple[TmtExitCodes, list[str]]:
+    """Run rpmdeplint test against given repositories.
+
+    :param work_dir: workdir
+    :param test_name: name of the rpmdeplint test to run
+    :param repo_urls: a dict where keys are repo names and values are repo URLs
+    :param task_ids: task ids
+    :param arch: architecture
+    :param memory_budget: memory budget in MiB, or None for no budget
+    :param partition_size: number of packages in the first partition
+    :param rpms_dir: local directory with RPMs to test instead of the task ids
+    :param profile: a list of profilers to run rpmdeplint under
+    :param baseline_cache: directory with cached repo baselines, or None
+                           to run the full check-repoclosure
+    :param in_subprocess: run rpmdeplint in a child process even without
+                          a memory budget
+    :return: tuple, (tmt exit code, names of the test logs)
+    """
+    if rpms_dir and not rpms_dir.is_dir():
+        print(
+            f'Error: unable to run the "{test_name}({arch})" test '
+            f"as {rpms_dir} is not a directory.",
+            file=sys.stderr,
+        )
+        return TmtExitCodes.ERROR, []
+
+    if rpms_dir:
+        rpms_list = get_local_rpms(rpms_dir, [arch])
+    else:
+        rpms_list = get_cached_rpms(work_dir, [arch], task_ids)
+
+    if not rpms_dir and not is_prepared(work_dir, task_ids, [arch]):
         # TODO: stderr
         print(
             f'Error: unable to run the "{test_name}({arch})" test '
             f"as RPMs for the task id {task_ids} were not downloaded."
         )
-        save_results_and_exit(TmtExitCodes.ERROR)
+        return TmtExitCodes.ERROR, []
 
     if not rpms_list:
         # skip the test if there are no RPMs for given arch
         # TODO: stderr
         print(
-            f'Skipping "{test_name}({arch})" test for the task id {task_ids} '
+            f'Skipping "{test_name}({arch})" test for {rpms_dir or task_ids} '
             f"as there are no RPMs for that architecture..."
         )
-        save_results_and_exit(TmtExitCodes.SKIPPED)
+        return TmtExitCodes.SKIPPED, []
 
-    return_code = run_rpmdeplint(test_name, repo_urls, rpms_list, arch, work_dir)
+    if memory_budget:
+        return_code = run_rpmdeplint_with_memory_budget(
+            test_name,
+            repo_urls,
+            rpms_list,
+            arch,
+            work_dir,
+            memory_budget,
+            partition_size,
+            profile,
+            baseline_cache,
+        )
+    elif in_subprocess:
+        return_code, _ = run_rpmdeplint_in_subprocess(
+            test_name,
+            repo_urls,
+            rpms_list,
+            arch,
+            work_dir,
+            profile,
+            baseline_cache,
+        )
+    else:
+        return_code = run_rpmdeplint(
+            test_name,
+            repo_urls,
+            rpms_list,
+            arch,
+            work_dir,
+            profile,
+            baseline_cache,
+        )
     tmt_exit_code = TmtExitCodes.from_rpmdeplint(RpmdeplintCodes.from_rc(return_code))
-    save_results_and_exit(
-        tmt_exit_code,
-        f"{test_name}-{arch}.log",
-    )
+    logs = [f"{test_name}-{arch}.log"]
+    if profile:
+        logs.extend(get_profile_files(get_logs_dir(work_dir), test_name, arch))
+    return tmt_exit_code, logs
+
+
+def run_pipeline(
+    work_dir: Path,
+    test_names: list[str],
+    release_id: str,
+    task_ids: list[str],
+    arches: list[str],
+    memory_budget: Optional[int] = None,
+    partition_size: int = DEFAULT_PARTITION_SIZE,
+    rpms_dir: Optional[Path] = None,
+    repo_config: Optional[Path] = None,
+    queue_size: int = 1,
+    profile: Optional[list[str]] = None,
+    baseline_cache: Optional[Path] = None,
+) -> None:
+    """Prepare workdir and run rpmdeplint tests, overlapping downloads with tests.
+
+    Packages and repo metadata are downloaded for one architecture after another
+    in a background thread; the metadata goes to rpmdeplint's on-disk cache.
+    Tests for an architecture run as soon as the packages from all tasks
+    and the metadata for that architecture are ready, while the remaining
+    architectures are still being downloaded. Tests run in child processes,
+    as libsolv holds the GIL and would stall the downloads otherwise.
+
+    :param work_dir: workdir
+    :param test_names: names of the rpmdeplint tests to run
+    :param release_id: release id, example: f33
+    :param task_ids: task ids
+    :param arches: list of architectures
+    :param memory_budget: memory budget in MiB, or None for no budget
+    :param partition_size: number of packages in the first partition
+    :param rpms_dir: local directory with RPMs to test instead of the task ids
+    :param repo_config: config file overriding repos for some releases
+    :param queue_size: how many architectures can be prepared ahead of the tests
+    :param profile: a list of profilers to run rpmdeplint under
+    :param baseline_cache: directory with cached repo baselines, or None
+                           to run the full check-repoclosure
+    :return: None
+    """
+    ready: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+
+    def _prepare_arches() -> None:
+        for arch in arches:
+            repo_urls = None
+            try:
+                if not rpms_dir:
+                    for task_id in task_ids:
+                        download_rpms(task_id, work_dir, [arch])
+                arch_repo_urls = get_repo_urls(
+                    release_id, arch, repo_config=repo_config
+                )
+                download_repodata(arch_repo_urls)
+                repo_urls = arch_repo_urls
+            except Exception:
+                logger.exception(f"Unable to prepare {arch}")
+            ready.put((arch, repo_urls))
+        # no more architectures
+        ready.put(None)
+
+    producer = threading.Thread(target=_prepare_arches, daemon=True)
+    producer.start()
+
+    results: list[tuple[str, TmtExitCodes, list[str]]] = []
+    while (item := ready.get()) is not None:
+        arch, repo_urls = item
+        for test_name in test_names:
+            if repo_urls is None:
+                print(
+                    f'Error: unable to run the "{test_name}({arch})" test '
+                    f"as the environment could not be prepared.",
+                    file=sys.stderr,
+                )
+                tmt_exit_code = TmtExitCodes.ERROR
+                logs: list[str] = []
+            else:
+                tmt_exit_code, logs = check(
+                    work_dir,
+                    test_name,
+                    repo_urls,
+                    task_ids,
+                    arch,
+                    memory_budget,
+                    partition_size,
+                    rpms_dir,
+                    profile,
+                    baseline_cache,
+                    in_subprocess=True,
+                )
+            results.append((f"/rpmdeplint/{test_name}/{arch}", tmt_exit_code, logs))
+
+    producer.join()
+    save_multiple_results_and_exit(results)
 
 
 def save_results_and_exit(
-    tmt_exit_code: TmtExitCodes, log_name: Optional[str] = None
+    tmt_exit_code: TmtExitCodes, logs: Optional[list[str]] = None
+) -> None:
+    save_multiple_results_and_exit([("/rpmdeplint", tmt_exit_code, logs or [])])
+
+
+def save_multiple_results_and_exit(
+    results: list[tuple[str, TmtExitCodes, list[str]]],
 ) -> None:
     if getenv("TMT_TEST_DATA"):
-        results = [
+        tmt_results = [
             {
-                "name": "/rpmdeplint",
+                "name": name,
                 "result": TmtResult.from_exit_code(tmt_exit_code).value,
-                "log": ["../output.txt", log_name] if log_name else ["../output.txt"],
+                "log": ["../output.txt", *logs],
             }
+            for name, tmt_exit_code, logs in results
         ]
         with open(f"{getenv('TMT_TEST_DATA')}/results.yaml", "w") as file:
-            yaml.dump(results, file)
+            yaml.dump(tmt_results, file)
         sys.exit(0)
 
-    sys.exit(tmt_exit_code.value)
+    sys.exit(TmtExitCodes.worst([x[1] for x in results]).value)
 
 
 def run(args):
     """Run, Rpmdeplint, run!"""
     if args.command == "prepare":
-        prepare(args.work_dir, args.task_id, args.arch)
+        prepare(args.work_dir, args.task_id, args.arch, args.rpms_dir)
     elif args.command == "run-test":
         arch = args.arch[0]
-        run_test(args.work_dir, args.test_name, args.release_id, args.task_id, arch)
+        run_test(
+            args.work_dir,
+            args.test_name,
+            args.release_id,
+            args.task_id,
+            arch,
+            args.memory_budget,
+            args.partition_size,
+            args.rpms_dir,
+            args.repo_config,
+            args.profile,
+            args.baseline_cache,
+        )
+    elif args.command == "pipeline":
+        run_pipeline(
+            args.work_dir,
+            args.test_names,
+            args.release_id,
+            args.task_id,
+            args.arch,
+            args.memory_budget,
+            args.partition_size,
+            args.rpms_dir,
+            args.repo_config,
+            args.queue_size,
+            args.profile,
+            args.baseline_cache,
+        )
 
 
 if __name__ == "__main__":
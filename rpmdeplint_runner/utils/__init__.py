@@ -1,4 +1,7 @@
 from rpmdeplint_runner.utils.common import http_get  # noqa: F401
 from rpmdeplint_runner.utils.common import run_command  # noqa: F401
 from rpmdeplint_runner.utils.common import run_rpmdeplint  # noqa: F401
+from rpmdeplint_runner.utils.common import run_rpmdeplint_in_subprocess  # noqa: F401
 from rpmdeplint_runner.utils.common import fix_arches  # noqa: F401
+from rpmdeplint_runner.utils.common import run_rpmdeplint_with_memory_budget  # noqa: F401
+from rpmdeplint_runner.utils.common import download_repodata  # noqa: F401
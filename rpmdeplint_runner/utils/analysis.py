@@ -0,0 +1,80 @@
+"""Running rpmdeplint analyses in-process, the same way the rpmdeplint CLI does."""
+
+import logging
+import sys
+from typing import Callable, Optional, TypeVar
+
+from rpmdeplint import cli as rpmdeplint_cli
+from rpmdeplint.analyzer import UnreadablePackageError
+from rpmdeplint.repodata import (
+    Cache,
+    PackageDownloadError,
+    Repo,
+    RepoDownloadError,
+)
+
+T = TypeVar("T")
+
+
+class SnapshotRepo(Repo):
+    """Repo that fetches its repomd.xml only once.
+
+    rpmdeplint fetches repomd.xml again every time download_repodata() is
+    called, e.g. by every DependencyAnalyzer built from the repo, so two
+    analyzers could see two different snapshots of a repo that was updated
+    in between. Here, later calls reopen primary and filelists of the first
+    snapshot instead.
+    """
+
+    def download_repodata(self):
+        if self._rpmmd_repomd is None:
+            super().download_repodata()
+            return
+
+        for file in (self.primary, self.filelists):
+            if file is not None:
+                file.close()
+        if self.is_local:
+            self.primary = open(self.primary_urls[0], "rb")
+            self.filelists = open(self.filelists_urls[0], "rb")
+        else:
+            self.primary = Cache.download_repodata_file(
+                self.primary_checksum, self.primary_urls
+            )
+            self.filelists = Cache.download_repodata_file(
+                self.filelists_checksum, self.filelists_urls
+            )
+
+
+def get_repos(repo_urls: dict[str, str]) -> list[SnapshotRepo]:
+    """Create repos from given repo URLs, same as "rpmdeplint --repo NAME,URL".
+
+    :param repo_urls: a dict where keys are repo names and values are repo URLs
+    :return: a list of SnapshotRepo instances
+    """
+    repos = []
+    for name, url in repo_urls.items():
+        if url.startswith("http") and "/metalink?" in url:
+            repos.append(SnapshotRepo(name, metalink=url))
+        else:
+            repos.append(SnapshotRepo(name, baseurl=url))
+    return repos
+
+
+def run_like_cli(func: Callable[[], T]) -> Optional[T]:
+    """Call given function with logging and error handling of the rpmdeplint CLI.
+
+    Only errors are logged to stderr, and so are repos and packages that
+    can't be loaded.
+
+    :param func: function to call
+    :return: whatever the function returns, or None if repos or packages
+             couldn't be loaded
+    """
+    logging.getLogger().setLevel(logging.DEBUG)
+    rpmdeplint_cli.log_to_stream(sys.stderr, level=logging.ERROR)
+    try:
+        return func()
+    except (UnreadablePackageError, RepoDownloadError, PackageDownloadError) as exc:
+        sys.stderr.write(f"{exc}\n")
+        return None
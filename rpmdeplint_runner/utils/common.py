@@ -1,16 +1,30 @@
 import logging
+import multiprocessing
 import os
+import resource
+import signal
 import subprocess
+import sys
 from os import getenv
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util import Retry
 
+from rpmdeplint_runner.outcome import RpmdeplintCodes
+from rpmdeplint_runner.utils.profiling import get_profile_stem, profile_call
+
 logger = logging.getLogger(__name__)
 
+# tests that can check the packages in smaller partitions, one by one;
+# all packages are still loaded, see PartitionedDependencyAnalyzer
+PARTITIONABLE_TESTS = ("check-conflicts",)
+
+# number of packages in the first partition in the memory-budgeted mode
+DEFAULT_PARTITION_SIZE = 100
+
 
 def http_get(url, as_json=False):
     """TODO."""
@@ -78,10 +92,23 @@ def fix_arches(arches: list[str]) -> list[str]:
     return arches
 
 
-def configure_logging_for_test(work_dir: Path, test_name: str, arch: str) -> None:
+def get_logs_dir(work_dir: Path) -> Path:
+    """Get directory where test logs and other artifacts are stored.
+
+    :param work_dir: workdir
+    :return: logs directory
+    """
+    return Path(getenv("TMT_TEST_DATA", work_dir))
+
+
+def configure_logging_for_test(
+    work_dir: Path, test_name: str, arch: str
+) -> logging.Handler:
     """Redirect everything rpmdeplint has to say to a file.
 
     Only log messages though, not stdout/stderr.
+
+    :return: the handler, so it can be removed once the test is done
     """
     logger = logging.getLogger("rpmdeplint")
     logger.setLevel(logging.DEBUG)
@@ -90,12 +117,28 @@ def configure_logging_for_test(work_dir: Path, test_name: str, arch: str) -> Non
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
 
-    logs_dir = getenv("TMT_TEST_DATA", work_dir)
-    log_filename = f"{logs_dir}/{test_name}-{arch}.log"
+    log_filename = get_logs_dir(work_dir) / f"{test_name}-{arch}.log"
     handler = logging.FileHandler(log_filename)
     handler.setFormatter(formatter)
 
     logger.addHandler(handler)
+    return handler
+
+
+def download_repodata(repo_urls: dict[str, str]) -> None:
+    """Download repo metadata into rpmdeplint's on-disk cache.
+
+    rpmdeplint then loads the metadata from the cache instead of downloading it.
+
+    :param repo_urls: a dict where keys are repo names and values are repo URLs
+    """
+    from rpmdeplint.repodata import Repo
+
+    for name, url in repo_urls.items():
+        repo = Repo(name, baseurl=url)
+        repo.download_repodata()
+        repo.primary.close()
+        repo.filelists.close()
 
 
 def run_rpmdeplint(
@@ -103,9 +146,17 @@ def run_rpmdeplint(
     repo_urls: dict[str, str],
     rpms: list[Path],
     arch: str,
-    work_dir,  # TODO: unused
+    work_dir,
+    profile: Optional[list[str]] = None,
+    baseline_cache: Optional[Path] = None,
 ) -> int:
-    """Run rpmdeplint."""
+    """Run rpmdeplint.
+
+    :param profile: a list of profilers to run rpmdeplint under, see PROFILERS
+    :param baseline_cache: directory with cached repo baselines; if set,
+                           check-repoclosure only checks packages affected
+                           by the given packages
+    """
     repo_params = []
     for name, url in repo_urls.items():
         repo_params.extend(["--repo", f"{name},{url}"])
@@ -115,7 +166,246 @@ def run_rpmdeplint(
 
     args = ["--quiet", test_name, "--arch", arch, *repo_params, *rpms_list]
 
-    configure_logging_for_test(work_dir=work_dir, test_name=test_name, arch=arch)
-    from rpmdeplint import cli as rpmdeplint_cli
+    handler = configure_logging_for_test(
+        work_dir=work_dir, test_name=test_name, arch=arch
+    )
+    try:
+        from rpmdeplint import cli as rpmdeplint_cli
+
+        def main() -> int:
+            if test_name == "check-repoclosure" and baseline_cache:
+                from rpmdeplint_runner.utils.repoclosure import (
+                    run_incremental_repoclosure,
+                )
+
+                return run_incremental_repoclosure(
+                    repo_urls, rpms_list, arch, baseline_cache
+                )
+            return rpmdeplint_cli.main(args)
+
+        if profile:
+            stem = get_profile_stem(get_logs_dir(work_dir), test_name, arch)
+            return profile_call(main, profile, stem)
+        return main()
+    finally:
+        # several tests can run in one process, don't leak logs between them
+        logging.getLogger("rpmdeplint").removeHandler(handler)
+        handler.close()
+
+
+def _run_in_child(conn, func: Callable, args: tuple, progress: bool) -> None:
+    """Call func(*args) and send the result and peak RSS (MiB) back to the parent.
+
+    If progress is set, func also gets a "report" keyword argument, a function
+    sending its argument to the parent right away.
+    """
+    result = None
+    kwargs = {}
+    if progress:
+        kwargs["report"] = lambda event: conn.send(("progress", event))
+    try:
+        result = func(*args, **kwargs)
+    except BaseException:
+        logger.exception(f"{func.__name__}() crashed")
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # ru_maxrss is in KiB on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+        conn.send(("result", result, peak_rss))
+        conn.close()
+
+
+def run_in_subprocess(
+    func: Callable, *args, on_progress: Optional[Callable[[Any], None]] = None
+) -> tuple[Any, int, int]:
+    """Call func(*args) in a spawned child process.
+
+    All memory allocated by the function (e.g. by libsolv) is released when
+    the child exits. The child is spawned, not forked, as the parent may have
+    other threads running (see run_pipeline()).
+
+    :param on_progress: if set, func gets a "report" keyword argument, and
+                        everything the child reports is passed to on_progress
+                        in the parent as soon as it arrives
+    :return: tuple, (result or None if the child failed, exit code of the child,
+             peak RSS of the child in MiB); the exit code is negative
+             if the child was killed by a signal
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_run_in_child,
+        args=(child_conn, func, args, on_progress is not None),
+    )
+    process.start()
+    child_conn.close()
+
+    result, peak_rss = None, 0
+    while True:
+        try:
+            message = parent_conn.recv()
+        except EOFError:
+            # the child died before sending the result back
+            break
+        if message[0] == "progress" and on_progress:
+            on_progress(message[1])
+        elif message[0] == "result":
+            _, result, peak_rss = message
+            break
+    process.join()
+    assert process.exitcode is not None
+    return result, process.exitcode, peak_rss
+
+
+def run_rpmdeplint_in_subprocess(
+    test_name: str,
+    repo_urls: dict[str, str],
+    rpms: list[Path],
+    arch: str,
+    work_dir,
+    profile: Optional[list[str]] = None,
+    baseline_cache: Optional[Path] = None,
+) -> tuple[int, int]:
+    """Run rpmdeplint in a child process.
+
+    :return: tuple, (rpmdeplint return code, peak RSS of the child in MiB);
+             the return code is negative if the child was killed by a signal
+    """
+    return_code, exit_code, peak_rss = run_in_subprocess(
+        run_rpmdeplint,
+        test_name,
+        repo_urls,
+        rpms,
+        arch,
+        work_dir,
+        profile,
+        baseline_cache,
+    )
+    if exit_code < 0:
+        return exit_code, peak_rss
+    if return_code is None:
+        return RpmdeplintCodes.ERROR.value, peak_rss
+    return return_code, peak_rss
+
+
+def run_rpmdeplint_with_memory_budget(
+    test_name: str,
+    repo_urls: dict[str, str],
+    rpms: list[Path],
+    arch: str,
+    work_dir,
+    memory_budget: int,
+    partition_size: int = DEFAULT_PARTITION_SIZE,
+    profile: Optional[list[str]] = None,
+    baseline_cache: Optional[Path] = None,
+) -> int:
+    """Run rpmdeplint while trying to keep its peak RSS within given budget.
+
+    Tests that allow it check partitions of the packages, one after another,
+    and the results are merged. The repos and all packages are loaded only
+    once, only the checked packages differ between partitions, so the result
+    is the same as for a full run. The partition size adapts to the measured
+    peak RSS, see check_partitions(). If the check gets killed in the middle
+    of a partition (most likely by the OOM killer), the remaining packages
+    are checked in a new child process with half the partition size.
+    Peak RSS is written to stderr.
+
+    :param memory_budget: memory budget in MiB
+    :param partition_size: number of packages in the first partition
+    :param profile: a list of profilers to run rpmdeplint under, see PROFILERS
+    :param baseline_cache: directory with cached repo baselines, see run_rpmdeplint()
+    :return: int, merged rpmdeplint return code
+    """
+    if test_name not in PARTITIONABLE_TESTS:
+        return_code, peak_rss = run_rpmdeplint_in_subprocess(
+            test_name, repo_urls, rpms, arch, work_dir, profile, baseline_cache
+        )
+        sys.stderr.write(f"Peak RSS of {test_name}({arch}): {peak_rss} MiB\n")
+        if peak_rss > memory_budget:
+            sys.stderr.write(
+                f"Warning: {test_name}({arch}) can't be partitioned and it exceeded "
+                f"the memory budget: {peak_rss} MiB > {memory_budget} MiB\n"
+            )
+        return return_code
+
+    from rpmdeplint_runner.utils.conflicts import find_conflicts_in_partitions
+
+    problems: list[str] = []
+    checked = 0
+    size = max(1, partition_size)
+    max_size = len(rpms)
+
+    while checked < len(rpms):
+        loaded, checking = False, 0
+
+        def on_progress(event: tuple) -> None:
+            nonlocal checked, loaded, checking
+            if event[0] == "loaded":
+                loaded = True
+                sys.stderr.write(
+                    f"Peak RSS of {test_name}({arch}) after loading the repos "
+                    f"and {len(rpms)} packages: {event[1]} MiB\n"
+                )
+                if event[1] > memory_budget:
+                    sys.stderr.write(
+                        f"Warning: {test_name}({arch}) exceeded the memory budget "
+                        f"before checking any packages: {event[1]} MiB > "
+                        f"{memory_budget} MiB; partitioning can't help with that\n"
+                    )
+            elif event[0] == "checking":
+                checking = event[1]
+            elif event[0] == "checked":
+                _, count, conflicts, peak_rss = event
+                checking = 0
+                checked += count
+                problems.extend(conflicts)
+                sys.stderr.write(
+                    f"Peak RSS of {test_name}({arch}) after checking "
+                    f"{checked}/{len(rpms)} packages: {peak_rss} MiB\n"
+                )
+
+        result, exit_code, _ = run_in_subprocess(
+            find_conflicts_in_partitions,
+            repo_urls,
+            rpms,
+            arch,
+            work_dir,
+            checked,
+            size,
+            max_size,
+            memory_budget,
+            profile,
+            on_progress=on_progress,
+        )
+        if result:
+            break
+
+        if exit_code == -signal.SIGKILL and checking > 1:
+            # the OOM killer most likely got us in the middle of a partition;
+            # the next run starts with the first package that wasn't checked
+            size = max_size = checking // 2
+            sys.stderr.write(
+                f"Warning: {test_name}({arch}) was killed while checking "
+                f"{checking} packages, retrying with {size} packages\n"
+            )
+            continue
+
+        if exit_code == -signal.SIGKILL:
+            # smaller partitions can't help if loading the repos and packages
+            # or checking a single package got killed
+            stage = "checking a single package" if loaded else "loading the repos"
+            sys.stderr.write(
+                f"Error: {test_name}({arch}) was killed while {stage}, giving up\n"
+            )
+        return RpmdeplintCodes.ERROR.value
 
-    return rpmdeplint_cli.main(args)
+    if problems:
+        # same output as "rpmdeplint check-conflicts"
+        sys.stderr.write("Undeclared file conflicts:\n")
+        sys.stderr.write("\n".join(sorted(problems)) + "\n")
+        return RpmdeplintCodes.FAILED.value
+    return RpmdeplintCodes.PASSED.value
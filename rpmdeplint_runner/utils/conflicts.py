@@ -0,0 +1,160 @@
+import logging
+import resource
+from pathlib import Path
+from typing import Callable, Optional
+
+from rpmdeplint import DependencyAnalyzer
+
+from rpmdeplint_runner.utils.analysis import get_repos, run_like_cli
+from rpmdeplint_runner.utils.common import configure_logging_for_test, get_logs_dir
+from rpmdeplint_runner.utils.profiling import get_profile_stem, profile_call
+
+
+class _PartitionView(list):
+    """List of packages under test that iterates only over a partition of them.
+
+    Membership tests still see all packages under test.
+    """
+
+    def __init__(self, partition: list, solvables: list):
+        super().__init__(partition)
+        self.all_solvables = set(solvables)
+
+    def __contains__(self, solvable) -> bool:
+        return solvable in self.all_solvables
+
+
+class PartitionedDependencyAnalyzer(DependencyAnalyzer):
+    """Dependency analyzer that can check the packages under test in partitions.
+
+    All packages under test stay in the pool, so dependencies between
+    sibling subpackages in different partitions are still satisfied,
+    and siblings are still considered as conflict candidates.
+    The pool is built only once, only the work of find_conflicts() is split.
+    """
+
+    solvables: list
+
+    def find_partition_conflicts(self, partition: list) -> list[str]:
+        """Find undeclared file conflicts of the given packages under test.
+
+        :param partition: solvables of the packages under test to check
+        :return: List of str describing each conflict found
+        """
+        # find_conflicts() iterates self.solvables to collect the packages
+        # to check, and also uses it to recognize packages under test
+        solvables = self.solvables
+        self.solvables = _PartitionView(partition, solvables)
+        try:
+            return self.find_conflicts()
+        finally:
+            self.solvables = solvables
+
+
+def get_peak_rss() -> int:
+    """Get peak RSS of the current process in MiB."""
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def check_partitions(
+    analyzer: PartitionedDependencyAnalyzer,
+    pending: list,
+    partition_size: int,
+    max_partition_size: int,
+    memory_budget: int,
+    report: Callable[[tuple], None],
+) -> None:
+    """Find undeclared file conflicts of given packages, partition by partition.
+
+    The partition size is halved when a partition pushed the peak RSS
+    over the budget, and doubled while the peak RSS stays well within it.
+    A partition that didn't raise the peak RSS doesn't shrink the size,
+    as smaller partitions wouldn't lower it either.
+
+    :param analyzer: dependency analyzer with all packages under test
+    :param pending: solvables of the packages under test to check
+    :param partition_size: number of packages in the first partition
+    :param max_partition_size: maximum number of packages in a partition
+    :param memory_budget: memory budget in MiB
+    :param report: called with ("checking", number of packages) before
+                   and with ("checked", number of packages, conflicts, peak RSS)
+                   after each partition
+    """
+    size = max(1, min(partition_size, max_partition_size))
+    while pending:
+        partition = pending[:size]
+        report(("checking", len(partition)))
+        peak_rss_before = get_peak_rss()
+        conflicts = analyzer.find_partition_conflicts(partition)
+        peak_rss = get_peak_rss()
+        report(("checked", len(partition), conflicts, peak_rss))
+        pending = pending[len(partition) :]
+
+        if peak_rss > memory_budget:
+            if peak_rss > peak_rss_before:
+                size = max(1, len(partition) // 2)
+        elif peak_rss < memory_budget // 2 and len(partition) == size:
+            size = min(size * 2, max_partition_size)
+
+
+def find_conflicts_in_partitions(
+    repo_urls: dict[str, str],
+    rpms: list[Path],
+    arch: str,
+    work_dir,
+    start: int,
+    partition_size: int,
+    max_partition_size: int,
+    memory_budget: int,
+    profile: Optional[list[str]] = None,
+    report: Callable[[tuple], None] = lambda event: None,
+) -> Optional[bool]:
+    """Find undeclared file conflicts of the packages under test in partitions.
+
+    Repos and all packages under test are loaded only once, see check_partitions().
+    Progress is reported as the partitions are checked, so that a run that
+    gets killed can be resumed.
+
+    :param repo_urls: a dict where keys are repo names and values are repo URLs
+    :param rpms: all packages under test
+    :param arch: architecture
+    :param work_dir: workdir
+    :param start: index of the first package to check, the packages before it
+                  were checked by a previous run
+    :param partition_size: number of packages in the first partition
+    :param max_partition_size: maximum number of packages in a partition
+    :param memory_budget: memory budget in MiB
+    :param profile: a list of profilers to run the check under, see PROFILERS
+    :param report: called with ("loaded", peak RSS) once everything is loaded,
+                   see check_partitions() for the other events
+    :return: True, or None if the check couldn't be performed
+    """
+    handler = configure_logging_for_test(
+        work_dir=work_dir, test_name="check-conflicts", arch=arch
+    )
+
+    def main() -> bool:
+        analyzer = PartitionedDependencyAnalyzer(
+            get_repos(repo_urls), [str(x) for x in rpms], arch=arch
+        )
+        report(("loaded", get_peak_rss()))
+        check_partitions(
+            analyzer,
+            analyzer.solvables[start:],
+            partition_size,
+            max_partition_size,
+            memory_budget,
+            report,
+        )
+        return True
+
+    try:
+        # loading the repos and packages is included, same as in run_rpmdeplint()
+        if profile:
+            stem = get_profile_stem(get_logs_dir(work_dir), "check-conflicts", arch)
+            return run_like_cli(lambda: profile_call(main, profile, stem))
+        return run_like_cli(main)
+    finally:
+        logging.getLogger("rpmdeplint").removeHandler(handler)
+        handler.close()
@@ -1,6 +1,10 @@
 import re
 from pathlib import Path
 from typing import Optional
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import yaml
 
 from rpmdeplint_runner.utils import http_get, run_command, fix_arches
 
@@ -21,7 +25,11 @@ KOJI_TOP_URL = "https://kojipkgs.fedoraproject.org"
 
 
 def get_repo_urls(
-    release_id: str, arch: str, exclude_buildroot=False, exclude_debuginfo=False
+    release_id: str,
+    arch: str,
+    exclude_buildroot=False,
+    exclude_debuginfo=False,
+    repo_config: Optional[Path] = None,
 ) -> dict[str, str]:
     """Get repo URLs for given release id.
 
@@ -29,8 +37,13 @@ def get_repo_urls(
     :param arch: architecture
     :param exclude_buildroot: bool, exclude buildroot repos or not
     :param exclude_debuginfo: bool, exclude debuginfo repos or not
+    :param repo_config: path to a config file that overrides repos for some releases
     :return: dict, a dict where keys are repo names and values are repo URLs
     """
+    if repo_config:
+        repo_urls = get_repo_urls_from_config(repo_config, release_id, arch)
+        if repo_urls is not None:
+            return repo_urls
 
     version = get_version(release_id)
     repo_name = f"fedora-{version}-{arch}"
@@ -95,12 +108,92 @@ def get_repo_urls(
     return result
 
 
+def get_repo_urls_from_config(
+    repo_config: Path, release_id: str, arch: str
+) -> Optional[dict[str, str]]:
+    """Get repo URLs for given release id from a config file.
+
+    The config file is a YAML mapping of release ids to mappings of repo names
+    to repo URLs. Both names and URLs can contain "{arch}" and "{release_id}"
+    placeholders, and also "{version}" for Fedora releases ("f40" -> "40").
+    Local paths and "file://" URLs are supported:
+
+        f40:
+          fedora-{version}-{arch}: /mnt/mirror/fedora/{version}/{arch}/os/
+          fedora-buildroot-{version}-{arch}: file:///mnt/mirror/buildroot/{arch}/
+
+    :param repo_config: path to the config file
+    :param release_id: release id, example: f40
+    :param arch: architecture
+    :return: dict, repo names and repo URLs, or None if the release is not configured
+    """
+    with open(repo_config) as f:
+        config = yaml.safe_load(f) or {}
+
+    if release_id not in config:
+        return None
+
+    placeholders = {"arch": arch, "release_id": release_id}
+    if re.match(r"^f(\d+)$", release_id):
+        placeholders["version"] = get_version(release_id)
+
+    result = {}
+    for name, url in config[release_id].items():
+        try:
+            repo_name = name.format(**placeholders)
+            repo_url = normalize_repo_url(url.format(**placeholders))
+        except KeyError as e:
+            raise ValueError(
+                f'Unknown placeholder {e} in repo config for release "{release_id}"'
+            ) from e
+        if is_local_repo(repo_url) and not repo_exists(repo_url):
+            raise ValueError(
+                f'Repo for release "{release_id}" doesn\'t exist: {repo_url}'
+            )
+        result[repo_name] = repo_url
+
+    return result
+
+
+def normalize_repo_url(repo_url: str) -> str:
+    """Turn local paths into "file://" URLs; leave other URLs as they are.
+
+    rpmdeplint only strips the "file://" prefix from local URLs, so the path
+    in the resulting URL is not percent-encoded.
+
+    :param repo_url: repository URL or a local path
+    :return: repository URL
+    """
+    scheme = urlparse(repo_url).scheme
+    if scheme == "file":
+        path = url2pathname(urlparse(repo_url).path).rstrip("/")
+    elif scheme:
+        return repo_url
+    else:
+        path = str(Path(repo_url).resolve())
+    # keep the trailing slash, the URL is a base URL of the repository
+    return f"file://{path}/" if repo_url.endswith("/") else f"file://{path}"
+
+
+def is_local_repo(repo_url: str) -> bool:
+    """Check if given repository URL points to a local directory.
+
+    :param repo_url: repository URL
+    :return: True if the repo is local, False otherwise
+    """
+    return urlparse(repo_url).scheme == "file"
+
+
 def repo_exists(repo_url: str) -> bool:
     """Check if given repository exists.
 
     :param repo_url: repository URL
     :return: True if the repo exists, False otherwise
     """
+    if is_local_repo(repo_url):
+        path = Path(url2pathname(urlparse(repo_url).path))
+        return (path / "repodata" / "repomd.xml").exists()
+
     _, status = http_get(repo_url)
     return status != 404
 
@@ -261,6 +354,24 @@ def get_cached_rpms(
     return rpms
 
 
+def get_local_rpms(rpms_dir: Path, arches: list[str]) -> list[Path]:
+    """Find RPM packages in a local directory that match given arches.
+
+    Source RPMs are ignored.
+
+    :param rpms_dir: directory with RPM packages, it is searched recursively
+    :param arches: a list of arches
+    :return: a list of packages
+    """
+    fix_arches(arches)
+
+    return sorted(
+        rpm
+        for rpm in rpms_dir.glob("**/*.rpm")
+        if any(rpm.name.endswith(f".{arch}.rpm") for arch in arches)
+    )
+
+
 def download_rpms(
     task_id: str, work_dir: Path, arches: list[str], skip_if_exists=True
 ) -> list[Path]:
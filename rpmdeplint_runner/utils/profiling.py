@@ -0,0 +1,97 @@
+import cProfile
+import io
+import logging
+import pstats
+import tracemalloc
+from pathlib import Path
+from typing import Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROFILERS = ("cprofile", "tracemalloc")
+
+# extensions of files written by the profilers
+PROFILE_EXTENSIONS = (".pstats", ".pstats.txt", ".tracemalloc", ".tracemalloc.txt")
+
+# how many lines to include in text summaries
+PROFILE_TOP_N = 50
+
+# how many frames tracemalloc should store for each allocation
+TRACEMALLOC_FRAMES = 25
+
+
+def get_profile_stem(logs_dir: Path, test_name: str, arch: str) -> Path:
+    """Get a path prefix for profiling files that doesn't clash with existing files.
+
+    Partitioned runs profile the same test multiple times; each run gets
+    a numbered prefix then.
+
+    :param logs_dir: directory where the files are stored
+    :param test_name: rpmdeplint test name
+    :param arch: architecture
+    :return: path prefix, example: logs/check-sat-x86_64
+    """
+    stem = logs_dir / f"{test_name}-{arch}"
+    n = 0
+    while any(Path(f"{stem}{ext}").exists() for ext in PROFILE_EXTENSIONS):
+        n += 1
+        stem = logs_dir / f"{test_name}-{arch}-{n}"
+    return stem
+
+
+def get_profile_files(logs_dir: Path, test_name: str, arch: str) -> list[str]:
+    """Find profiling files written for given test.
+
+    :param logs_dir: directory where the files are stored
+    :param test_name: rpmdeplint test name
+    :param arch: architecture
+    :return: a list of file names, relative to logs_dir
+    """
+    files: set[str] = set()
+    for ext in PROFILE_EXTENSIONS:
+        for pattern in (f"{test_name}-{arch}{ext}", f"{test_name}-{arch}-*{ext}"):
+            files.update(x.name for x in logs_dir.glob(pattern))
+    return sorted(files)
+
+
+def profile_call(func: Callable[[], T], profilers: list[str], stem: Path) -> T:
+    """Call given function under given profilers and store the results.
+
+    cprofile writes "<stem>.pstats" and a top-N summary "<stem>.pstats.txt",
+    tracemalloc writes a snapshot "<stem>.tracemalloc" and a top-N summary
+    "<stem>.tracemalloc.txt".
+
+    :param func: function to call
+    :param profilers: a list of profiler names, see PROFILERS
+    :param stem: path prefix for the files with results
+    :return: whatever the function returns
+    """
+    profiler = cProfile.Profile() if "cprofile" in profilers else None
+    if "tracemalloc" in profilers:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    if profiler:
+        profiler.enable()
+    try:
+        return func()
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(f"{stem}.pstats")
+            summary = io.StringIO()
+            stats = pstats.Stats(profiler, stream=summary)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_N)
+            Path(f"{stem}.pstats.txt").write_text(summary.getvalue())
+
+        if "tracemalloc" in profilers:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            snapshot.dump(f"{stem}.tracemalloc")
+            lines = [f"Current: {current} B, peak: {peak} B", ""]
+            lines.extend(str(x) for x in snapshot.statistics("lineno")[:PROFILE_TOP_N])
+            Path(f"{stem}.tracemalloc.txt").write_text("\n".join(lines) + "\n")
+
+        logger.info(f"Profiling results stored in {stem}.*")
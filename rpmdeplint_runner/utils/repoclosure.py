@@ -0,0 +1,233 @@
+"""Incremental repoclosure check.
+
+rpmdeplint's check-repoclosure tries to install every package from the repos,
+which is slow and gives the same answer for almost all of them on every run
+against the same repo snapshot. Here, the list of packages that are already
+broken in the snapshot (the baseline) is computed once and cached, and only
+the packages that can be affected by the packages under test are checked.
+
+A package from the repos that was installable in the baseline can only break
+if something it (transitively) requires may be provided by a package that
+the packages under test obsolete; otherwise the baseline solution is still
+a valid solution. Such packages, together with the already broken ones, are
+checked exactly the same way rpmdeplint checks them, so the result is
+identical to the full check.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import solv
+from rpmdeplint import DependencyAnalyzer
+from rpmdeplint import cli as rpmdeplint_cli
+
+from rpmdeplint_runner.utils.analysis import SnapshotRepo, get_repos, run_like_cli
+
+# log into the rpmdeplint logger hierarchy so messages end up in the test log
+logger = logging.getLogger("rpmdeplint.incremental")
+
+
+def get_snapshot_key(repos: list[SnapshotRepo], arch: str) -> str:
+    """Get a key identifying the current snapshot of given repos.
+
+    Only repomd.xml is fetched here, primary and filelists go to
+    rpmdeplint's on-disk cache and are not loaded into memory.
+    Analyzers built from the same repos later use the same snapshot.
+
+    :param repos: repos
+    :param arch: architecture
+    :return: str, a checksum of the repomd checksums of all repos
+    """
+    checksum = hashlib.sha256(f"{arch}\n".encode())
+    for repo in sorted(repos, key=lambda x: x.name):
+        repo.download_repodata()
+        repo.primary.close()
+        repo.filelists.close()
+        checksum.update(
+            f"{repo.name}:{repo.primary_checksum}:{repo.filelists_checksum}\n".encode()
+        )
+    return checksum.hexdigest()
+
+
+def get_package_key(solvable) -> str:
+    """Get a key identifying a package across pools.
+
+    Example: fedora-40-x86_64:bash-5.2.26-3.fc40.x86_64
+    """
+    return f"{solvable.repo.name}:{solvable}"
+
+
+def get_repoclosure_candidates(analyzer: DependencyAnalyzer, obsoleted: list):
+    """Yield packages from the repos that check-repoclosure checks, in order."""
+    for solvable in analyzer.pool.solvables_iter():
+        if solvable in analyzer.solvables:
+            continue  # checked by check-sat command instead
+        if solvable in obsoleted:
+            continue  # no reason to check it
+        if not analyzer.pool.isknownarch(solvable.archid):
+            continue
+        yield solvable
+
+
+def find_broken_packages(analyzer: DependencyAnalyzer) -> list[str]:
+    """Find packages from the repos that can't be installed on their own.
+
+    :param analyzer: dependency analyzer without any packages under test
+    :return: a list of package keys
+    """
+    solver = analyzer.pool.Solver()
+    existing_obs_sel = analyzer._select_obsoleted_by(analyzer.pool.solvables_iter())
+
+    broken = []
+    for solvable in get_repoclosure_candidates(analyzer, existing_obs_sel.solvables()):
+        jobs = solvable.Selection().jobs(
+            solv.Job.SOLVER_INSTALL
+        ) + existing_obs_sel.jobs(solv.Job.SOLVER_ERASE)
+        if solver.solve(jobs):
+            broken.append(get_package_key(solvable))
+    return broken
+
+
+def find_affected_packages(analyzer: DependencyAnalyzer, seeds: list) -> set[int]:
+    """Find packages that (transitively) require something the seeds may provide.
+
+    :param analyzer: dependency analyzer
+    :param seeds: a list of solvables
+    :return: a set of solvable ids, including the seeds
+    """
+    pool = analyzer.pool
+
+    # reverse dependency graph: provider id -> ids of packages requiring it
+    required_by: dict[int, set[int]] = {}
+    for solvable in pool.solvables_iter():
+        # marker 0: both regular requires and prerequires
+        for dep in solvable.lookup_deparray(solv.SOLVABLE_REQUIRES, 0):
+            for provider in pool.whatprovides(dep):
+                required_by.setdefault(provider.id, set()).add(solvable.id)
+
+    affected = {x.id for x in seeds}
+    pending = list(affected)
+    while pending:
+        for solvable_id in required_by.get(pending.pop(), ()):
+            if solvable_id not in affected:
+                affected.add(solvable_id)
+                pending.append(solvable_id)
+    return affected
+
+
+def find_repoclosure_problems(
+    analyzer: DependencyAnalyzer, baseline_broken: set[str]
+) -> list[str]:
+    """Incremental version of DependencyAnalyzer.find_repoclosure_problems().
+
+    :param analyzer: dependency analyzer
+    :param baseline_broken: keys of packages broken in the repo snapshot
+    :return: List of str problem descriptions if any problems were found
+    """
+    problems = []
+    solver = analyzer.pool.Solver()
+    obs_sel = analyzer._select_obsoleted_by(analyzer.solvables)
+    existing_obs_sel = analyzer._select_obsoleted_by(
+        s for s in analyzer.pool.solvables_iter() if s.repo.name != "@commandline"
+    )
+    obsoleted = obs_sel.solvables() + existing_obs_sel.solvables()
+    affected = find_affected_packages(analyzer, obs_sel.solvables())
+
+    checked = 0
+    for solvable in get_repoclosure_candidates(analyzer, obsoleted):
+        if (
+            solvable.id not in affected
+            and get_package_key(solvable) not in baseline_broken
+        ):
+            continue
+        checked += 1
+        logger.debug("Checking requires for %s", solvable)
+        jobs = (
+            solvable.Selection().jobs(solv.Job.SOLVER_INSTALL)
+            + obs_sel.jobs(solv.Job.SOLVER_ERASE)
+            + existing_obs_sel.jobs(solv.Job.SOLVER_ERASE)
+        )
+        if solver_problems := solver.solve(jobs):
+            problem_msgs = [str(p) for p in solver_problems]
+            # pre-existing problems are not considered problems, same as in rpmdeplint
+            jobs = solvable.Selection().jobs(
+                solv.Job.SOLVER_INSTALL
+            ) + existing_obs_sel.jobs(solv.Job.SOLVER_ERASE)
+            if existing_problems := solver.solve(jobs):
+                for p in existing_problems:
+                    # format right away, the problem doesn't outlive the solver
+                    logger.warning(f"Ignoring pre-existing repoclosure problem: {p}")
+            else:
+                problems.extend(problem_msgs)
+
+    logger.info(f"Checked {checked} packages affected by the packages under test")
+    return problems
+
+
+def get_baseline(
+    repos: list[SnapshotRepo], arch: str, snapshot_key: str, baseline_cache: Path
+) -> set[str]:
+    """Load broken packages for given repo snapshot, or compute and cache them.
+
+    :param repos: repos, see get_snapshot_key()
+    :param arch: architecture
+    :param snapshot_key: repo snapshot key
+    :param baseline_cache: directory where baselines are cached
+    :return: a set of package keys
+    """
+    baseline_path = baseline_cache / f"{snapshot_key}.json"
+    if baseline_path.exists():
+        logger.info(f"Using cached baseline {baseline_path}")
+        return set(json.loads(baseline_path.read_text())["broken"])
+
+    logger.info(f"Computing baseline for repo snapshot {snapshot_key}")
+    analyzer = DependencyAnalyzer(repos, [], arch=arch)
+    try:
+        broken = find_broken_packages(analyzer)
+    finally:
+        # don't keep two pools with all the repos in memory at the same time
+        analyzer.pool.free()
+
+    baseline_cache.mkdir(parents=True, exist_ok=True)
+    # write to a temporary file first, parallel runs may share the cache
+    temp_path = baseline_path.with_suffix(f".{os.getpid()}.tmp")
+    temp_path.write_text(json.dumps({"broken": broken}))
+    temp_path.rename(baseline_path)
+    return set(broken)
+
+
+def run_incremental_repoclosure(
+    repo_urls: dict[str, str], rpms: list[str], arch: str, baseline_cache: Path
+) -> int:
+    """Run check-repoclosure relative to a cached baseline of the repos.
+
+    Mimics "rpmdeplint --quiet check-repoclosure": problems are written
+    to stderr, and the return codes are the same.
+
+    :param repo_urls: a dict where keys are repo names and values are repo URLs
+    :param rpms: a list of RPM paths
+    :param arch: architecture
+    :param baseline_cache: directory where baselines are cached
+    :return: int, rpmdeplint return code
+    """
+
+    def main() -> int:
+        # repomd.xml is fetched only once, so the baseline and the check
+        # both use the snapshot the key was computed for
+        repos = get_repos(repo_urls)
+        snapshot_key = get_snapshot_key(repos, arch)
+        baseline_broken = get_baseline(repos, arch, snapshot_key, baseline_cache)
+        analyzer = DependencyAnalyzer(repos, rpms, arch=arch)
+        if problems := find_repoclosure_problems(analyzer, baseline_broken):
+            return rpmdeplint_cli.log_problems(
+                "Dependency problems with repos", problems
+            )
+        return rpmdeplint_cli.ExitCode.OK
+
+    return_code = run_like_cli(main)
+    if return_code is None:
+        return rpmdeplint_cli.ExitCode.ERROR
+    return return_code
@@ -20,3 +20,17 @@ def test_tmt_from_rpmdeplint():
     assert tmt_error_usage.value == 2
     assert tmt_failed.value == 1
     assert tmt_error_unknown.value == 2
+
+
+def test_tmt_worst():
+    assert TmtExitCodes.worst([]) == TmtExitCodes.SKIPPED
+    assert (
+        TmtExitCodes.worst([TmtExitCodes.SKIPPED, TmtExitCodes.PASSED])
+        == TmtExitCodes.PASSED
+    )
+    assert (
+        TmtExitCodes.worst(
+            [TmtExitCodes.ERROR, TmtExitCodes.FAILED, TmtExitCodes.PASSED]
+        )
+        == TmtExitCodes.ERROR
+    )
@@ -0,0 +1,90 @@
+import pytest
+import yaml
+
+from rpmdeplint_runner import run
+from rpmdeplint_runner.outcome import TmtExitCodes
+
+
+def test_run_pipeline(tmp_path, monkeypatch):
+    """Test that every (test, arch) gets a result, in order, even if an arch fails."""
+    downloaded = []
+    checked = []
+
+    def fake_get_repo_urls(release_id, arch, repo_config=None):
+        if arch == "aarch64":
+            raise ValueError("no repos for aarch64")
+        return {f"fedora-{arch}": f"https://example.com/{arch}/"}
+
+    def fake_check(work_dir, test_name, repo_urls, task_ids, arch, *args, **kwargs):
+        # tests must not hold the GIL while the next arch is being downloaded
+        assert kwargs["in_subprocess"]
+        checked.append((test_name, arch))
+        if test_name == "check-sat":
+            return TmtExitCodes.FAILED, [f"{test_name}-{arch}.log"]
+        return TmtExitCodes.PASSED, [f"{test_name}-{arch}.log"]
+
+    monkeypatch.setattr(
+        run,
+        "download_rpms",
+        lambda task_id, work_dir, arches: downloaded.append((task_id, arches[0])),
+    )
+    monkeypatch.setattr(run, "get_repo_urls", fake_get_repo_urls)
+    monkeypatch.setattr(run, "download_repodata", lambda repo_urls: None)
+    monkeypatch.setattr(run, "check", fake_check)
+    monkeypatch.setenv("TMT_TEST_DATA", str(tmp_path))
+
+    with pytest.raises(SystemExit) as exc:
+        run.run_pipeline(
+            tmp_path,
+            ["check-sat", "check-conflicts"],
+            "f40",
+            ["1", "2"],
+            ["x86_64", "aarch64", "s390x"],
+        )
+    assert exc.value.code == 0
+
+    assert downloaded == [
+        ("1", "x86_64"),
+        ("2", "x86_64"),
+        ("1", "aarch64"),
+        ("2", "aarch64"),
+        ("1", "s390x"),
+        ("2", "s390x"),
+    ]
+    assert checked == [
+        ("check-sat", "x86_64"),
+        ("check-conflicts", "x86_64"),
+        ("check-sat", "s390x"),
+        ("check-conflicts", "s390x"),
+    ]
+
+    results = yaml.safe_load((tmp_path / "results.yaml").read_text())
+    assert [(x["name"], x["result"]) for x in results] == [
+        ("/rpmdeplint/check-sat/x86_64", "fail"),
+        ("/rpmdeplint/check-conflicts/x86_64", "pass"),
+        ("/rpmdeplint/check-sat/aarch64", "error"),
+        ("/rpmdeplint/check-conflicts/aarch64", "error"),
+        ("/rpmdeplint/check-sat/s390x", "fail"),
+        ("/rpmdeplint/check-conflicts/s390x", "pass"),
+    ]
+    assert results[0]["log"] == ["../output.txt", "check-sat-x86_64.log"]
+    assert results[2]["log"] == ["../output.txt"]
+
+
+def test_parse_args_profile_env(monkeypatch):
+    argv = ["run.py", "run-test", "-r", "f40", "--arch", "x86_64", "-t", "1"]
+    monkeypatch.setenv("RPMDEPLINT_PROFILE", " cprofile, tracemalloc ,")
+    monkeypatch.setattr("sys.argv", [*argv, "-n", "check"])
+    assert run.parse_args().profile == ["cprofile", "tracemalloc"]
+
+    monkeypatch.setenv("RPMDEPLINT_PROFILE", " ")
+    assert run.parse_args().profile is None
+
+
+def test_check_missing_rpms_dir(tmp_path, capsys):
+    tmt_exit_code, logs = run.check(
+        tmp_path, "check-sat", {}, [], "x86_64", rpms_dir=tmp_path / "typo"
+    )
+    assert tmt_exit_code == TmtExitCodes.ERROR
+    assert logs == []
+    assert "is not a directory" in capsys.readouterr().err
@@ -0,0 +1,55 @@
+import pytest
+
+
+@pytest.fixture
+def build_analyzer():
+    """Build a rpmdeplint dependency analyzer from a synthetic libsolv pool.
+
+    Packages are given as dicts with "name" and optional "evr", "arch",
+    "requires", "provides" and "obsoletes" keys. Packages under test go to
+    the "@commandline" repo first, same as in DependencyAnalyzer.__init__().
+    """
+    solv = pytest.importorskip("solv")
+
+    def add_package(repo, spec):
+        pool = repo.pool
+        solvable = repo.add_solvable()
+        solvable.name = spec["name"]
+        solvable.evr = spec.get("evr", "1-1")
+        solvable.arch = spec.get("arch", "x86_64")
+        solvable.add_deparray(
+            solv.SOLVABLE_PROVIDES,
+            pool.Dep(solvable.name).Rel(solv.REL_EQ, pool.Dep(solvable.evr)),
+        )
+        for keyname, key in [
+            (solv.SOLVABLE_REQUIRES, "requires"),
+            (solv.SOLVABLE_PROVIDES, "provides"),
+            (solv.SOLVABLE_OBSOLETES, "obsoletes"),
+        ]:
+            for dep in spec.get(key, []):
+                solvable.add_deparray(keyname, pool.Dep(dep))
+        return solvable
+
+    def build(cls, repo_packages, tested_packages):
+        pool = solv.Pool()
+        pool.setarch("x86_64")
+
+        analyzer = cls.__new__(cls)
+        analyzer.pool = pool
+        analyzer.allconflicts = False
+        analyzer.repos_by_name = {}
+        analyzer.commandline_repo = pool.add_repo("@commandline")
+        analyzer.solvables = [
+            add_package(analyzer.commandline_repo, x) for x in tested_packages
+        ]
+        repo = pool.add_repo("fedora")
+        for spec in repo_packages:
+            add_package(repo, spec)
+
+        analyzer.commandline_repo.internalize()
+        repo.internalize()
+        pool.addfileprovides()
+        pool.createwhatprovides()
+        return analyzer
+
+    return build
@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+pytest.importorskip("rpmdeplint")
+
+from rpmdeplint.repodata import Repo  # noqa: E402
+
+from rpmdeplint_runner.utils import analysis  # noqa: E402
+
+
+def test_snapshot_repo(monkeypatch, tmp_path):
+    """Test that repomd.xml is fetched only once, later calls reuse the snapshot."""
+    (tmp_path / "repodata").mkdir()
+    for name in ("primary", "filelists"):
+        (tmp_path / "repodata" / f"{name}-1.xml").write_text("snapshot 1")
+        (tmp_path / "repodata" / f"{name}-2.xml").write_text("snapshot 2")
+
+    fetches = []
+
+    def fake_download_repodata(self):
+        # every fetch of repomd.xml sees a newer snapshot
+        fetches.append(self.name)
+        self._rpmmd_repomd = {
+            "records": {
+                name: {
+                    "checksum": f"{name}-{len(fetches)}",
+                    "location_href": f"repodata/{name}-{len(fetches)}.xml",
+                }
+                for name in ("primary", "filelists")
+            }
+        }
+        self.primary = open(self.primary_urls[0], "rb")
+        self.filelists = open(self.filelists_urls[0], "rb")
+
+    monkeypatch.setattr(Repo, "download_repodata", fake_download_repodata)
+
+    (repo,) = analysis.get_repos({"fedora": f"file://{tmp_path}"})
+    for _ in range(3):
+        repo.download_repodata()
+        assert repo.primary.read() == b"snapshot 1"
+        assert repo.filelists.read() == b"snapshot 1"
+
+    assert fetches == ["fedora"]
+    repo.primary.close()
+    repo.filelists.close()
+
+
+def test_run_like_cli(monkeypatch, capsys):
+    # don't replace the handlers of the root logger for the other tests
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "level", root.level)
+    monkeypatch.setattr(
+        analysis.rpmdeplint_cli, "log_to_stream", lambda stream, level: None
+    )
+
+    def fail():
+        raise analysis.RepoDownloadError("Failed to download repo metadata")
+
+    assert analysis.run_like_cli(lambda: 42) == 42
+    assert analysis.run_like_cli(fail) is None
+    assert capsys.readouterr().err == "Failed to download repo metadata\n"
@@ -0,0 +1,146 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from rpmdeplint_runner.utils import common
+
+
+def fake_partitioned_run(rpms, runs, kill=lambda partition: False):
+    """Fake running find_conflicts_in_partitions() in a child process."""
+
+    def run(func, repo_urls, all_rpms, arch, work_dir, start, size, *args, **kwargs):
+        # every run loads all the packages
+        assert all_rpms == rpms
+        runs.append((start, size))
+        report = kwargs["on_progress"]
+        if kill(None):
+            return None, -9, 0
+        report(("loaded", 10))
+        pending = rpms[start:]
+        while pending:
+            partition = pending[:size]
+            report(("checking", len(partition)))
+            if kill(partition):
+                # pretend the OOM killer got us
+                return None, -9, 0
+            conflicts = []
+            if Path("1.rpm") in partition:
+                conflicts.append("1.rpm provides /x which is also provided by 4.rpm")
+            if Path("4.rpm") in partition:
+                conflicts.append("4.rpm provides /x which is also provided by 1.rpm")
+            report(("checked", len(partition), conflicts, 20))
+            pending = pending[len(partition) :]
+        return True, 0, 20
+
+    return run
+
+
+@pytest.fixture
+def conflicts_module(monkeypatch):
+    # the real worker needs rpmdeplint; it is never called here
+    conflicts = types.ModuleType("rpmdeplint_runner.utils.conflicts")
+    conflicts.find_conflicts_in_partitions = None
+    monkeypatch.setitem(sys.modules, "rpmdeplint_runner.utils.conflicts", conflicts)
+
+
+def test_run_rpmdeplint_with_memory_budget(monkeypatch, capsys, conflicts_module):
+    """Test that a killed run resumes with smaller partitions."""
+    runs = []
+    rpms = [Path(f"{x}.rpm") for x in range(7)]
+    monkeypatch.setattr(
+        common,
+        "run_in_subprocess",
+        fake_partitioned_run(
+            rpms, runs, kill=lambda partition: partition and len(partition) > 2
+        ),
+    )
+
+    return_code = common.run_rpmdeplint_with_memory_budget(
+        "check-conflicts", {}, rpms, "x86_64", Path("."), 100, partition_size=5
+    )
+
+    assert return_code == 3
+    # 5 -> killed, 2 + 2 + 2 + 1 in the second run
+    assert runs == [(0, 5), (0, 2)]
+    err = capsys.readouterr().err
+    assert "Peak RSS of check-conflicts(x86_64) after checking 7/7 packages" in err
+    assert err.endswith(
+        "Undeclared file conflicts:\n"
+        "1.rpm provides /x which is also provided by 4.rpm\n"
+        "4.rpm provides /x which is also provided by 1.rpm\n"
+    )
+
+
+def test_run_rpmdeplint_with_memory_budget_resume(monkeypatch, conflicts_module):
+    """Test that packages checked before the run was killed are not checked again."""
+    runs = []
+    rpms = [Path(f"{x}.rpm") for x in range(7)]
+    monkeypatch.setattr(
+        common,
+        "run_in_subprocess",
+        fake_partitioned_run(rpms, runs, kill=lambda partition: partition == rpms[3:6]),
+    )
+
+    return_code = common.run_rpmdeplint_with_memory_budget(
+        "check-conflicts", {}, rpms, "x86_64", Path("."), 100, partition_size=3
+    )
+
+    assert return_code == 3
+    # 0-2 checked and 3-5 killed in the first run, 3-6 checked one by one
+    assert runs == [(0, 3), (3, 1)]
+
+
+def test_run_rpmdeplint_with_memory_budget_fail_fast(
+    monkeypatch, capsys, conflicts_module
+):
+    """Test that partitioning gives up when smaller partitions can't help."""
+    rpms = [Path(f"{x}.rpm") for x in range(7)]
+
+    runs = []
+    monkeypatch.setattr(
+        common,
+        "run_in_subprocess",
+        fake_partitioned_run(rpms, runs, kill=lambda partition: partition is None),
+    )
+    return_code = common.run_rpmdeplint_with_memory_budget(
+        "check-conflicts", {}, rpms, "x86_64", Path("."), 100, partition_size=4
+    )
+    assert return_code == 2
+    assert runs == [(0, 4)]
+    assert "killed while loading the repos" in capsys.readouterr().err
+
+    runs = []
+    monkeypatch.setattr(
+        common,
+        "run_in_subprocess",
+        fake_partitioned_run(
+            rpms, runs, kill=lambda partition: partition and Path("2.rpm") in partition
+        ),
+    )
+    return_code = common.run_rpmdeplint_with_memory_budget(
+        "check-conflicts", {}, rpms, "x86_64", Path("."), 100, partition_size=4
+    )
+    assert return_code == 2
+    assert runs == [(0, 4), (0, 2), (2, 1)]
+    assert "killed while checking a single package" in capsys.readouterr().err
+
+
+def test_run_rpmdeplint_with_memory_budget_not_partitionable(monkeypatch):
+    calls = []
+
+    def fake_run(test_name, repo_urls, rpms, *args):
+        calls.append(rpms)
+        return 0, 1000
+
+    monkeypatch.setattr(common, "run_rpmdeplint_in_subprocess", fake_run)
+
+    rpms = [Path(f"{x}.rpm") for x in range(7)]
+    for test_name in ("check-sat", "check-upgrade"):
+        return_code = common.run_rpmdeplint_with_memory_budget(
+            test_name, {}, rpms, "x86_64", Path("."), 100, partition_size=2
+        )
+        assert return_code == 0
+
+    assert calls == [rpms, rpms]
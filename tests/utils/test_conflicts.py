@@ -0,0 +1,95 @@
+import pytest
+
+pytest.importorskip("rpmdeplint")
+
+from rpmdeplint import DependencyAnalyzer  # noqa: E402
+
+from rpmdeplint_runner.utils import conflicts  # noqa: E402
+from rpmdeplint_runner.utils.conflicts import (  # noqa: E402
+    PartitionedDependencyAnalyzer,
+)
+
+FILES = {
+    "foo": {"/usr/bin/x"},
+    "bar": {"/usr/bin/x"},
+    "foo-doc": {"/usr/share/doc/foo"},
+    "foo-help": {"/usr/share/doc/foo"},
+}
+
+REPO_PACKAGES = [{"name": "bar"}]
+
+TESTED_PACKAGES = [
+    {"name": "foo", "evr": "2-1", "requires": ["foo-libs"]},
+    {"name": "foo-libs", "evr": "2-1"},
+    {"name": "foo-doc", "evr": "2-1"},
+    {"name": "foo-help", "evr": "2-1"},
+]
+
+
+@pytest.fixture(autouse=True)
+def fake_files(monkeypatch):
+    """Files come from FILES, and no file conflict is permitted."""
+    monkeypatch.setattr(
+        DependencyAnalyzer,
+        "_files_in_solvable",
+        lambda self, solvable: set(FILES.get(solvable.name, set())),
+    )
+    monkeypatch.setattr(
+        DependencyAnalyzer,
+        "_file_conflict_is_permitted",
+        lambda self, left, right, filename: False,
+    )
+
+
+def test_partitioned_find_conflicts(build_analyzer):
+    """Test that sibling subpackages in other partitions don't change the outcome."""
+    full = build_analyzer(DependencyAnalyzer, REPO_PACKAGES, TESTED_PACKAGES)
+    expected = full.find_conflicts()
+    assert expected == [
+        "foo-2-1.x86_64 provides /usr/bin/x which is also provided by bar-1-1.x86_64",
+        "foo-doc-2-1.x86_64 provides /usr/share/doc/foo "
+        "which is also provided by foo-help-2-1.x86_64",
+        "foo-help-2-1.x86_64 provides /usr/share/doc/foo "
+        "which is also provided by foo-doc-2-1.x86_64",
+    ]
+
+    # "foo" requires "foo-libs", and "foo-doc" conflicts with "foo-help",
+    # but each of them is checked in a different partition
+    analyzer = build_analyzer(
+        PartitionedDependencyAnalyzer, REPO_PACKAGES, TESTED_PACKAGES
+    )
+    problems = []
+    for partition in [[0, 2], [1, 3]]:
+        problems.extend(
+            analyzer.find_partition_conflicts(
+                [analyzer.solvables[x] for x in partition]
+            )
+        )
+
+    assert sorted(problems) == expected
+    assert analyzer.find_conflicts() == expected
+
+    # loading only the partition would hide the conflict of "foo",
+    # as it could not be installed without "foo-libs"
+    naive = build_analyzer(
+        DependencyAnalyzer, REPO_PACKAGES, [TESTED_PACKAGES[0], TESTED_PACKAGES[2]]
+    )
+    assert naive.find_conflicts() == []
+
+
+def test_check_partitions(build_analyzer, monkeypatch):
+    """Test that partitions shrink only while it lowers the peak RSS."""
+    analyzer = build_analyzer(
+        PartitionedDependencyAnalyzer, REPO_PACKAGES, TESTED_PACKAGES * 4
+    )
+    # the pool alone is over the budget, the first partition adds a bit more
+    peak_rss = iter([200, 250, 250, 250, 250, 250])
+    monkeypatch.setattr(conflicts, "get_peak_rss", lambda: next(peak_rss))
+
+    events = []
+    conflicts.check_partitions(analyzer, analyzer.solvables, 8, 16, 100, events.append)
+
+    assert [x[1] for x in events if x[0] == "checking"] == [8, 4, 4]
+    assert sum(len(x[2]) for x in events if x[0] == "checked") == len(
+        analyzer.find_conflicts()
+    )
@@ -1,4 +1,6 @@
-from rpmdeplint_runner.utils.fedora import get_repo_urls
+import pytest
+
+from rpmdeplint_runner.utils.fedora import get_local_rpms, get_repo_urls
 
 
 # TODO: do not actually query Bodhi – tests will stop working in future
@@ -22,3 +24,55 @@ def test_get_repo_urls():
     # check that the buildroot URL doesn't point to the "latest" repo;
     # the "/latest/" part of the URL should have been replaced by the real repo id
     assert "/latest/" not in repo_urls["fedora-buildroot-40-x86_64"]
+
+
+def test_get_repo_urls_from_config(tmp_path):
+    """Test that repos from the config file override Bodhi-driven resolution."""
+    mirror_dir = tmp_path / "my mirror"
+    repo_dir = mirror_dir / "40" / "x86_64"
+    (repo_dir / "repodata").mkdir(parents=True)
+    (repo_dir / "repodata" / "repomd.xml").write_text("")
+
+    repo_config = tmp_path / "repos.yaml"
+    repo_config.write_text(
+        "f40:\n"
+        f"  fedora-{{version}}-{{arch}}: {mirror_dir}/{{version}}/{{arch}}/\n"
+        "  fedora-updates-{version}-{arch}: https://example.com/{release_id}/{arch}/\n"
+        "eln:\n"
+        f"  eln-{{arch}}: {mirror_dir.as_uri()}/40/{{arch}}/\n"
+        "broken:\n"
+        "  broken-{version}: https://example.com/\n"
+    )
+
+    repo_urls = get_repo_urls("f40", "x86_64", repo_config=repo_config)
+    assert repo_urls == {
+        "fedora-40-x86_64": f"file://{repo_dir}/",
+        "fedora-updates-40-x86_64": "https://example.com/f40/x86_64/",
+    }
+
+    # non-Fedora releases work as long as they don't use "{version}";
+    # percent-encoded file URLs are decoded for rpmdeplint
+    repo_urls = get_repo_urls("eln", "x86_64", repo_config=repo_config)
+    assert repo_urls == {"eln-x86_64": f"file://{repo_dir}/"}
+    with pytest.raises(ValueError):
+        get_repo_urls("broken", "x86_64", repo_config=repo_config)
+
+    # missing local repos are reported right away
+    with pytest.raises(ValueError):
+        get_repo_urls("f40", "aarch64", repo_config=repo_config)
+
+
+def test_get_local_rpms(tmp_path):
+    for name in [
+        "foo-1.0-1.fc40.x86_64.rpm",
+        "foo-1.0-1.fc40.src.rpm",
+        "foo-1.0-1.fc40.aarch64.rpm",
+        "sub/foo-doc-1.0-1.fc40.noarch.rpm",
+    ]:
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).touch()
+
+    assert get_local_rpms(tmp_path, ["x86_64"]) == [
+        tmp_path / "foo-1.0-1.fc40.x86_64.rpm",
+        tmp_path / "sub/foo-doc-1.0-1.fc40.noarch.rpm",
+    ]
@@ -0,0 +1,30 @@
+from rpmdeplint_runner.utils.profiling import (
+    get_profile_files,
+    get_profile_stem,
+    profile_call,
+)
+
+
+def test_profile_call(tmp_path):
+    """Test that profiling files are written and repeated runs don't overwrite them."""
+    for _ in range(2):
+        stem = get_profile_stem(tmp_path, "check-sat", "x86_64")
+        result = profile_call(
+            lambda: sum(range(1000)), ["cprofile", "tracemalloc"], stem
+        )
+        assert result == 499500
+
+    # unrelated tests are not picked up
+    (tmp_path / "check-x86_64.pstats").touch()
+
+    assert get_profile_files(tmp_path, "check-sat", "x86_64") == [
+        "check-sat-x86_64-1.pstats",
+        "check-sat-x86_64-1.pstats.txt",
+        "check-sat-x86_64-1.tracemalloc",
+        "check-sat-x86_64-1.tracemalloc.txt",
+        "check-sat-x86_64.pstats",
+        "check-sat-x86_64.pstats.txt",
+        "check-sat-x86_64.tracemalloc",
+        "check-sat-x86_64.tracemalloc.txt",
+    ]
+    assert "cumulative" in (tmp_path / "check-sat-x86_64.pstats.txt").read_text()
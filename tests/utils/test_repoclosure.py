@@ -0,0 +1,91 @@
+import logging
+import types
+
+import pytest
+
+pytest.importorskip("solv")
+pytest.importorskip("rpmdeplint")
+
+from rpmdeplint import DependencyAnalyzer  # noqa: E402
+
+from rpmdeplint_runner.utils import repoclosure  # noqa: E402
+
+REPO_PACKAGES = [
+    # broken by the tested libfoo, which obsoletes libfoo.so.1
+    {"name": "libfoo", "provides": ["libfoo.so.1"]},
+    {"name": "app", "requires": ["libfoo.so.1"]},
+    # already broken in the repos
+    {"name": "broken", "requires": ["missing"]},
+    # not affected by the tested packages at all
+    {"name": "zlib"},
+    {"name": "other", "requires": ["zlib"]},
+]
+
+TESTED_PACKAGES = [{"name": "libfoo", "evr": "2-1", "provides": ["libfoo.so.2"]}]
+
+
+def test_find_repoclosure_problems(build_analyzer, caplog):
+    """Test that the incremental check gives the same result as the full check."""
+    full_analyzer = build_analyzer(DependencyAnalyzer, REPO_PACKAGES, TESTED_PACKAGES)
+    expected = full_analyzer.find_repoclosure_problems()
+    assert len(expected) == 1
+    assert "app-1-1.x86_64" in expected[0]
+
+    baseline_analyzer = build_analyzer(DependencyAnalyzer, REPO_PACKAGES, [])
+    baseline = repoclosure.find_broken_packages(baseline_analyzer)
+    assert baseline == ["fedora:broken-1-1.x86_64"]
+
+    caplog.set_level(logging.DEBUG, logger="rpmdeplint.incremental")
+    analyzer = build_analyzer(DependencyAnalyzer, REPO_PACKAGES, TESTED_PACKAGES)
+    assert repoclosure.find_repoclosure_problems(analyzer, set(baseline)) == expected
+
+    # log records format solvables lazily, the pools above must be still alive
+    checked = [
+        x.getMessage()
+        for x in caplog.records
+        if x.name == "rpmdeplint.incremental" and x.msg == "Checking requires for %s"
+    ]
+    assert checked == [
+        "Checking requires for app-1-1.x86_64",
+        "Checking requires for broken-1-1.x86_64",
+    ]
+
+
+def test_get_snapshot_key():
+    def fake_repo(name, checksum):
+        return types.SimpleNamespace(
+            name=name,
+            primary_checksum=checksum,
+            filelists_checksum=checksum,
+            primary=open(__file__),
+            filelists=open(__file__),
+            download_repodata=lambda: None,
+        )
+
+    fedora, buildroot = fake_repo("fedora", "aaa"), fake_repo("buildroot", "bbb")
+
+    key = repoclosure.get_snapshot_key([fedora, buildroot], "x86_64")
+    # the order of repos doesn't matter
+    assert key == repoclosure.get_snapshot_key([buildroot, fedora], "x86_64")
+    assert key != repoclosure.get_snapshot_key([fedora, buildroot], "aarch64")
+    fedora.primary_checksum = "ccc"
+    assert key != repoclosure.get_snapshot_key([fedora, buildroot], "x86_64")
+
+
+def test_get_baseline(build_analyzer, monkeypatch, tmp_path):
+    """Test that the baseline is computed on a cache miss and loaded on a hit."""
+    monkeypatch.setattr(
+        repoclosure,
+        "DependencyAnalyzer",
+        lambda repos, rpms, arch: build_analyzer(DependencyAnalyzer, REPO_PACKAGES, []),
+    )
+
+    baseline = repoclosure.get_baseline([], "x86_64", "abc", tmp_path / "cache")
+    assert baseline == {"fedora:broken-1-1.x86_64"}
+    assert (tmp_path / "cache" / "abc.json").exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the baseline should have been loaded from the cache")
+
+    monkeypatch.setattr(repoclosure, "DependencyAnalyzer", fail)
+    assert repoclosure.get_baseline([], "x86_64", "abc", tmp_path / "cache") == baseline